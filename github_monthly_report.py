@@ -3,16 +3,25 @@
 GitHub Activity Report Generator
 
 Fetches closed pull requests and issues from specified repositories
-for a given month using the GitHub CLI (gh command).
+for a given month from the GitHub GraphQL API, authenticated with the
+token of the GitHub CLI (gh command).
 """
 
 import argparse
 import json
-import subprocess
 import sys
-from datetime import datetime
-from typing import List, Dict, Any
-from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from github_report_lib import (
+    CACHE_DIR,
+    SEP_DASH,
+    SEP_EQ,
+    SEP_LINE,
+    check_gh_installed,
+    search_issues,
+)
 
 
 # ==================== CONFIGURATION ====================
@@ -35,6 +44,10 @@ REPOSITORIES = [
 ]
 # =======================================================
 
+# How long after a month has ended its results are cached. GitHub's search
+# index lags behind, so items closed late in the month may not show up yet.
+CACHE_GRACE_PERIOD = timedelta(days=1)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -42,6 +55,11 @@ def parse_arguments():
         description="Generate a report of closed PRs and issues from GitHub repositories"
     )
     parser.add_argument("month", help="Month to query (format: YYYY-MM, e.g., 2026-01)")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached results and fetch everything from GitHub",
+    )
     return parser.parse_args()
 
 
@@ -71,163 +89,168 @@ def parse_month(month_str: str) -> tuple:
         sys.exit(1)
 
 
-def check_gh_installed() -> bool:
-    """Check if gh CLI is installed and authenticated."""
-    try:
-        result = subprocess.run(
-            ["gh", "auth", "status"], capture_output=True, text=True, check=False
-        )
-        return result.returncode == 0
-    except FileNotFoundError:
-        return False
+# Fields fetched for each search result, by GraphQL type
+SEARCH_NODE_FIELDS = """
+    __typename
+    ... on PullRequest { number title url closedAt mergedAt }
+    ... on Issue { number title url closedAt }
+"""
 
 
-def fetch_closed_prs(
-    repo: str, start_date: datetime, end_date: datetime
-) -> List[Dict[str, Any]]:
+def fetch_all_closed(
+    repos: List[str], start_date: datetime, end_date: datetime
+) -> Tuple[Dict[str, Dict[str, List[Dict[str, Any]]]], Set[str]]:
     """
-    Fetch closed pull requests for a repository.
+    Fetch pull requests and issues closed in a date range for all repositories.
+
+    All repositories are searched with a single GraphQL request; further
+    requests are only made for repositories with more than one page of
+    results and are sent over the same connection.
 
     Args:
-        repo: Repository in format "owner/repo"
+        repos: List of repositories in format "owner/repo"
         start_date: Start of date range
-        end_date: End of date range
+        end_date: End of date range (exclusive)
 
     Returns:
-        List of closed PRs
+        Tuple of (repo_data, complete). repo_data maps each repository to
+        {"prs": [...], "issues": [...]}, leaving out repositories whose search
+        failed. complete holds the repositories fetched without any error,
+        whose results are known to be whole.
     """
-    cmd = [
-        "gh",
-        "pr",
-        "list",
-        "--repo",
-        repo,
-        "--state",
-        "closed",
-        "--limit",
-        "1000",
-        "--json",
-        "number,title,url,closedAt,mergedAt",
-    ]
-
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    # The closed: qualifier takes an inclusive range of dates
+    last_day = end_date - timedelta(days=1)
+    closed_range = f"{start_date.strftime('%Y-%m-%d')}..{last_day.strftime('%Y-%m-%d')}"
+
+    aliases = {f"r{i}": repo for i, repo in enumerate(repos)}
+    results, errored = search_issues(
+        {
+            alias: f"repo:{repo} closed:{closed_range} sort:created-desc"
+            for alias, repo in aliases.items()
+        },
+        SEARCH_NODE_FIELDS,
+    )
 
-        prs = json.loads(result.stdout)
+    fetched = {}
+    for alias, nodes in results.items():
+        repo_data = {"prs": [], "issues": []}
+        for node in nodes:
+            kind = "prs" if node.pop("__typename") == "PullRequest" else "issues"
+            repo_data[kind].append(node)
+        fetched[aliases[alias]] = repo_data
 
-        # Filter PRs closed in the specified month
-        filtered_prs = []
-        for pr in prs:
-            if pr.get("closedAt"):
-                closed_at = datetime.strptime(pr["closedAt"], "%Y-%m-%dT%H:%M:%SZ")
-                if start_date <= closed_at < end_date:
-                    filtered_prs.append(pr)
+    complete = {aliases[alias] for alias in results if alias not in errored}
+    return fetched, complete
 
-        return filtered_prs
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching PRs from {repo}: {e.stderr}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing PR data from {repo}: {e}")
-        return []
+def get_cache_path(repo: str, start_date: datetime) -> Path:
+    """Return the cache file holding a repository's items for a month."""
+    owner, name = repo.split("/", 1)
+    return CACHE_DIR / "monthly" / owner / name / f"{start_date.strftime('%Y-%m')}.json"
 
 
-def fetch_closed_issues(
-    repo: str, start_date: datetime, end_date: datetime
-) -> List[Dict[str, Any]]:
+def load_cached(repo: str, start_date: datetime) -> Optional[Dict[str, List]]:
     """
-    Fetch closed issues for a repository.
+    Load cached PRs and issues for a repository and month.
 
     Args:
         repo: Repository in format "owner/repo"
-        start_date: Start of date range
-        end_date: End of date range
+        start_date: First day of the month
 
     Returns:
-        List of closed issues
+        Cached {"prs": [...], "issues": [...]}, or None if not cached
     """
-    cmd = [
-        "gh",
-        "issue",
-        "list",
-        "--repo",
-        repo,
-        "--state",
-        "closed",
-        "--limit",
-        "1000",
-        "--json",
-        "number,title,url,closedAt",
-    ]
-
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        with open(get_cache_path(repo, start_date)) as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
 
-        issues = json.loads(result.stdout)
+    # Anything else than the expected layout is treated as not cached
+    if not isinstance(data, dict) or not all(
+        isinstance(data.get(kind), list) for kind in ("prs", "issues")
+    ):
+        return None
 
-        # Filter issues closed in the specified month
-        filtered_issues = []
-        for issue in issues:
-            if issue.get("closedAt"):
-                closed_at = datetime.strptime(issue["closedAt"], "%Y-%m-%dT%H:%M:%SZ")
-                if start_date <= closed_at < end_date:
-                    filtered_issues.append(issue)
+    return data
 
-        return filtered_issues
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching issues from {repo}: {e.stderr}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing issue data from {repo}: {e}")
-        return []
+def save_cached(repo: str, start_date: datetime, data: Dict[str, List]) -> None:
+    """
+    Store PRs and issues for a repository and month in the cache.
 
+    Args:
+        repo: Repository in format "owner/repo"
+        start_date: First day of the month
+        data: {"prs": [...], "issues": [...]} to cache
+    """
+    cache_path = get_cache_path(repo, start_date)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(data, f)
+    except OSError as e:
+        print(f"Warning: could not write cache file {cache_path}: {e}")
 
-def generate_report(repos: List[str], month_str: str) -> None:
+
+def generate_report(repos: List[str], month_str: str, use_cache: bool = True) -> None:
     """
     Generate and print a report of closed PRs and issues.
 
     Args:
         repos: List of repositories in format "owner/repo"
         month_str: Month in format YYYY-MM
+        use_cache: Whether to read previously cached results
     """
     start_date, end_date = parse_month(month_str)
 
-    print(f"\n{'='*70}")
+    print(f"\n{SEP_EQ}")
     print(f"GitHub Activity Report - {start_date.strftime('%B %Y')}")
-    print(f"{'='*70}\n")
-
-    total_prs = 0
-    total_issues = 0
-    repo_data = defaultdict(lambda: {"prs": [], "issues": []})
-
-    # Fetch data for each repository
-    for repo in repos:
-        print(f"Fetching data from {repo}...")
-
-        # Fetch pull requests
-        prs = fetch_closed_prs(repo, start_date, end_date)
-        repo_data[repo]["prs"] = prs
-        total_prs += len(prs)
-
-        # Fetch issues
-        issues = fetch_closed_issues(repo, start_date, end_date)
-        repo_data[repo]["issues"] = issues
-        total_issues += len(issues)
-
-    print()
-
-    # Print summary
-    print(f"{'─'*70}")
-    print(f"SUMMARY")
-    print(f"{'─'*70}")
-    print(f"Total Repositories: {len(repos)}")
-    print(f"Total Closed Pull Requests: {total_prs}")
-    print(f"Total Closed Issues: {total_issues}")
-    print(f"Total Items: {total_prs + total_issues}\n")
-
-    # Print detailed results per repository
+    print(f"{SEP_EQ}\n")
+
+    # Only months that ended at least CACHE_GRACE_PERIOD ago are cached, the
+    # current one may still change
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cacheable = end_date + CACHE_GRACE_PERIOD <= now
+
+    repo_data = {}
+    if use_cache and cacheable:
+        for repo in repos:
+            cached = load_cached(repo, start_date)
+            if cached is not None:
+                repo_data[repo] = cached
+
+    missing = [repo for repo in repos if repo not in repo_data]
+    if missing:
+        print(f"Fetching data from {len(missing)} repositories...")
+        fetched, complete = fetch_all_closed(missing, start_date, end_date)
+
+        for repo in missing:
+            if repo in fetched:
+                repo_data[repo] = fetched[repo]
+                if cacheable and repo in complete:
+                    save_cached(repo, start_date, fetched[repo])
+            else:
+                repo_data[repo] = {"prs": [], "issues": []}
+    else:
+        print("Using cached data for all repositories.")
+
+    total_prs = sum(len(data["prs"]) for data in repo_data.values())
+    total_issues = sum(len(data["issues"]) for data in repo_data.values())
+
+    # Collect the report and write it in one go once all data is available
+    out = ["\n"]
+
+    # Summary
+    out.append(f"{SEP_LINE}\n")
+    out.append(f"SUMMARY\n")
+    out.append(f"{SEP_LINE}\n")
+    out.append(f"Total Repositories: {len(repos)}\n")
+    out.append(f"Total Closed Pull Requests: {total_prs}\n")
+    out.append(f"Total Closed Issues: {total_issues}\n")
+    out.append(f"Total Items: {total_prs + total_issues}\n\n")
+
+    # Detailed results per repository
     for repo in repos:
         prs = repo_data[repo]["prs"]
         issues = repo_data[repo]["issues"]
@@ -235,34 +258,34 @@ def generate_report(repos: List[str], month_str: str) -> None:
         if not prs and not issues:
             continue
 
-        print(f"\n{'='*70}")
-        print(f"Repository: {repo}")
-        print(f"{'='*70}")
+        out.append(f"\n{SEP_EQ}\n")
+        out.append(f"Repository: {repo}\n")
+        out.append(f"{SEP_EQ}\n")
 
         if prs:
-            print(f"\n📌 Closed Pull Requests ({len(prs)}):")
-            print(f"{'-'*70}")
+            out.append(f"\n📌 Closed Pull Requests ({len(prs)}):\n")
+            out.append(f"{SEP_DASH}\n")
             for pr in prs:
-                closed_date = datetime.strptime(pr["closedAt"], "%Y-%m-%dT%H:%M:%SZ")
                 merged_status = " [MERGED]" if pr.get("mergedAt") else " [CLOSED]"
-                print(f"  • #{pr['number']}: {pr['title']}{merged_status}")
-                print(f"    Closed: {closed_date.strftime('%Y-%m-%d')}")
-                print(f"    Link: {pr['url']}")
-                print()
+                out.append(f"  • #{pr['number']}: {pr['title']}{merged_status}\n")
+                out.append(f"    Closed: {pr['closedAt'][:10]}\n")
+                out.append(f"    Link: {pr['url']}\n")
+                out.append("\n")
 
         if issues:
-            print(f"🔧 Closed Issues ({len(issues)}):")
-            print(f"{'-'*70}")
+            out.append(f"🔧 Closed Issues ({len(issues)}):\n")
+            out.append(f"{SEP_DASH}\n")
             for issue in issues:
-                closed_date = datetime.strptime(issue["closedAt"], "%Y-%m-%dT%H:%M:%SZ")
-                print(f"  • #{issue['number']}: {issue['title']}")
-                print(f"    Closed: {closed_date.strftime('%Y-%m-%d')}")
-                print(f"    Link: {issue['url']}")
-                print()
+                out.append(f"  • #{issue['number']}: {issue['title']}\n")
+                out.append(f"    Closed: {issue['closedAt'][:10]}\n")
+                out.append(f"    Link: {issue['url']}\n")
+                out.append("\n")
+
+    out.append(f"\n{SEP_EQ}\n")
+    out.append("Report generation complete!\n")
+    out.append(f"{SEP_EQ}\n\n")
 
-    print(f"\n{'='*70}")
-    print("Report generation complete!")
-    print(f"{'='*70}\n")
+    sys.stdout.write("".join(out))
 
 
 def main():
@@ -281,7 +304,7 @@ def main():
         print("Please edit the REPOSITORIES list at the top of the script.")
         sys.exit(1)
 
-    generate_report(REPOSITORIES, args.month)
+    generate_report(REPOSITORIES, args.month, use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+"""
+Shared helpers for the GitHub report scripts.
+
+Provides access to the GitHub CLI (gh) and the GitHub API (including
+batched GraphQL searches), the cache
+directory used by the reports, and the separator lines they print.
+"""
+
+import functools
+import http.client
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple
+
+
+# Data that does not change between runs is cached here
+CACHE_DIR = Path.home() / ".cache" / "github_report"
+
+# How long the authenticated user's login is reused before it is looked up again
+USER_CACHE_MAX_AGE = timedelta(days=7)
+
+# GitHub API server, and seconds to wait for it before giving up on a request
+GITHUB_API_HOST = "api.github.com"
+GITHUB_API_TIMEOUT = 30
+
+# Maximum number of results per search page allowed by the GraphQL API
+SEARCH_PAGE_SIZE = 100
+
+# Separator lines used in the reports
+SEP_EQ = "=" * 70
+SEP_LINE = "─" * 70
+SEP_DASH = "-" * 70
+
+
+@functools.lru_cache(maxsize=1)
+def check_gh_installed() -> bool:
+    """Check if gh CLI is installed and authenticated."""
+    try:
+        result = subprocess.run(
+            ["gh", "auth", "status"], capture_output=True, text=True, check=False
+        )
+        return result.returncode == 0
+    except FileNotFoundError:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def get_current_user() -> str:
+    """
+    Get the authenticated GitHub user's login.
+
+    The login is cached on disk and reused for USER_CACHE_MAX_AGE before
+    it is looked up again.
+    """
+    user_cache = CACHE_DIR / "user"
+    try:
+        modified = datetime.fromtimestamp(user_cache.stat().st_mtime)
+        if datetime.now() - modified < USER_CACHE_MAX_AGE:
+            login = user_cache.read_text().strip()
+            if login:
+                return login
+    except OSError:
+        pass
+
+    try:
+        result = subprocess.run(
+            ["gh", "api", "user", "--jq", ".login"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error fetching current user: {e.stderr}")
+        sys.exit(1)
+
+    login = result.stdout.strip()
+    try:
+        user_cache.parent.mkdir(parents=True, exist_ok=True)
+        user_cache.write_text(login)
+    except OSError:
+        pass
+
+    return login
+
+
+@functools.lru_cache(maxsize=1)
+def get_gh_token() -> str:
+    """Get the token the gh CLI is authenticated with."""
+    result = subprocess.run(
+        ["gh", "auth", "token"], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def post_graphql(
+    connection: http.client.HTTPSConnection, token: str, query: str
+) -> Dict[str, Any]:
+    """
+    Send a GraphQL query to the GitHub API over an open connection.
+
+    Args:
+        connection: Connection to the GitHub API, reused between requests
+        token: GitHub token used for authentication
+        query: GraphQL query string
+
+    Returns:
+        Decoded JSON response, including any GraphQL errors
+    """
+    connection.request(
+        "POST",
+        "/graphql",
+        body=json.dumps({"query": query}),
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "User-Agent": "github-report",
+        },
+    )
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise http.client.HTTPException(
+            f"HTTP {response.status}: {body.decode(errors='replace')}"
+        )
+    return json.loads(body)
+
+
+def build_search_query(searches: Dict[str, tuple], node_fields: str) -> str:
+    """
+    Build a GraphQL query running several searches in one request.
+
+    Args:
+        searches: Mapping of alias to (search string, page cursor or None)
+        node_fields: GraphQL fields to fetch for each search result
+
+    Returns:
+        GraphQL query string
+    """
+    parts = []
+    for alias, (search, cursor) in searches.items():
+        after = f", after: {json.dumps(cursor)}" if cursor else ""
+        parts.append(
+            f"{alias}: search(query: {json.dumps(search)}, type: ISSUE, "
+            f"first: {SEARCH_PAGE_SIZE}{after}) {{\n"
+            f"  pageInfo {{ hasNextPage endCursor }}\n"
+            f"  nodes {{ {node_fields} }}\n"
+            f"}}"
+        )
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+
+def search_issues(
+    searches: Dict[str, str], node_fields: str
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Set[str]]:
+    """
+    Run several issue and pull request searches through the GraphQL API.
+
+    All searches are sent in a single request; further requests are only
+    made for searches with more than one page of results and are sent
+    over the same connection.
+
+    Args:
+        searches: Mapping of alias (a GraphQL name) to search string
+        node_fields: GraphQL fields to fetch for each search result
+
+    Returns:
+        Tuple of (results, errored). results maps each alias to its result
+        nodes, leaving out searches that failed. errored holds the aliases
+        of searches that reported an error, whose results may be partial.
+    """
+    try:
+        token = get_gh_token()
+    except subprocess.CalledProcessError as e:
+        print(f"Error getting GitHub token: {e.stderr}")
+        return {}, set()
+
+    results = {alias: [] for alias in searches}
+    failed = set()
+    errored = set()
+    pending = {alias: (search, None) for alias, search in searches.items()}
+
+    connection = http.client.HTTPSConnection(
+        GITHUB_API_HOST, timeout=GITHUB_API_TIMEOUT
+    )
+    try:
+        while pending:
+            query = build_search_query(pending, node_fields)
+            try:
+                response = post_graphql(connection, token, query)
+            except (OSError, http.client.HTTPException, json.JSONDecodeError) as e:
+                print(f"Error fetching data from GitHub: {e}")
+                failed.update(pending)
+                break
+
+            # Errors for individual searches still return data for the others.
+            # Results of a search with an error may be partial, and an error
+            # without a path may concern any of them.
+            for error in response.get("errors", []):
+                print(f"Error fetching data from GitHub: {error.get('message')}")
+                path = error.get("path") or []
+                if path and path[0] in pending:
+                    errored.add(path[0])
+                else:
+                    errored.update(pending)
+
+            data = response.get("data") or {}
+            next_pending = {}
+            for alias, (search, _) in pending.items():
+                page = data.get(alias)
+                if page is None:
+                    failed.add(alias)
+                    continue
+
+                # Items that could not be resolved are null, with an error
+                results[alias].extend(node for node in page["nodes"] if node is not None)
+
+                if page["pageInfo"]["hasNextPage"]:
+                    next_pending[alias] = (search, page["pageInfo"]["endCursor"])
+
+            pending = next_pending
+    finally:
+        connection.close()
+
+    return {alias: nodes for alias, nodes in results.items() if alias not in failed}, errored
@@ -3,16 +3,31 @@
 GitHub Weekly Activity Report
 
 Fetches pull requests and issues where the authenticated user is an author
-or contributor for a specified week using the GitHub CLI (gh command).
+or contributor for a specified week from the GitHub GraphQL API,
+authenticated with the token of the GitHub CLI (gh command).
 """
 
 import argparse
-import json
-import subprocess
 import sys
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 
+from github_report_lib import (
+    SEP_DASH,
+    SEP_EQ,
+    SEP_LINE,
+    check_gh_installed,
+    get_current_user,
+    search_issues,
+)
+
+# Month abbreviations indexed by month number
+MONTH_ABBREVIATIONS = (
+    "", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -69,94 +84,81 @@ def get_week_range(week_num: int = None, year: int = None) -> tuple:
     return start_date, end_date, week_description
 
 
-def check_gh_installed() -> bool:
-    """Check if gh CLI is installed and authenticated."""
-    try:
-        result = subprocess.run(
-            ["gh", "auth", "status"], capture_output=True, text=True, check=False
-        )
-        return result.returncode == 0
-    except FileNotFoundError:
-        return False
-
-
-def get_current_user() -> str:
-    """Get the authenticated GitHub user's login."""
-    try:
-        result = subprocess.run(
-            ["gh", "api", "user", "--jq", ".login"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching current user: {e.stderr}")
-        sys.exit(1)
+def format_date(timestamp: str) -> str:
+    """Format a GitHub ISO 8601 timestamp as 'YYYY Mon DD' without parsing it."""
+    return f"{timestamp[:4]} {MONTH_ABBREVIATIONS[int(timestamp[5:7])]} {timestamp[8:10]}"
+
+
+# Fields fetched for each search result, by GraphQL type
+SEARCH_NODE_FIELDS = """
+    __typename
+    ... on PullRequest {
+        number title url state createdAt closedAt repository { nameWithOwner }
+    }
+    ... on Issue {
+        number title url state createdAt closedAt repository { nameWithOwner }
+    }
+"""
 
 
 def search_user_activity(
-    username: str, start_date: datetime, end_date: datetime, item_type: str
+    username: str, start_date: datetime, end_date: datetime
 ) -> List[Dict[str, Any]]:
     """
-    Search for user's PRs or issues using GitHub search API.
+    Search for user's PRs and issues using GitHub search API.
+
+    Both searches are sent to the GraphQL API in a single request.
 
     Args:
         username: GitHub username
         start_date: Start of date range
         end_date: End of date range
-        item_type: Either 'pr' or 'issue'
 
     Returns:
-        List of PRs or issues that were updated (created or closed) in the date range
+        List of PRs and issues that were created or closed in the date range
     """
-    try:
-        # Use gh search to find items by author
-        cmd = [
-            "gh",
-            "search",
-            item_type + "s",
-            "--author",
-            username,
-            "--limit",
-            "100",
-            "--json",
-            "number,title,url,repository,state,createdAt,closedAt",
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        items = json.loads(result.stdout)
-        
-        # Filter items that were created or closed in the specified week
-        filtered_items = []
-        for item in items:
-            include_item = False
-            
-            # Check if created in the week
-            if item.get("createdAt"):
-                created_at = datetime.strptime(item["createdAt"], "%Y-%m-%dT%H:%M:%SZ")
-                if start_date <= created_at < end_date:
-                    include_item = True
-            
-            # Check if closed in the week (gh search returns 0001-01-01 for null)
-            if item.get("closedAt") and not item["closedAt"].startswith("0001-01-01"):
-                closed_at = datetime.strptime(item["closedAt"], "%Y-%m-%dT%H:%M:%SZ")
-                if start_date <= closed_at < end_date:
-                    include_item = True
-            
-            if include_item:
-                # Add item type to each item
-                item["item_type"] = item_type
-                filtered_items.append(item)
-        
-        return filtered_items
-
-    except subprocess.CalledProcessError as e:
-        print(f"Error searching {item_type}s: {e.stderr}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing {item_type} data: {e}")
-        return []
+    # Anything created or closed in the week was last updated on or after its
+    # start, and was created before its end (items are never closed before
+    # they are created), so both dates narrow the search on the server side.
+    # Searches must be limited to either issues or pull requests.
+    qualifiers = (
+        f"author:{username} "
+        f"updated:>={start_date.strftime('%Y-%m-%d')} "
+        f"created:<{end_date.strftime('%Y-%m-%d')} "
+        "sort:updated-desc"
+    )
+    results, _ = search_issues(
+        {"prs": f"is:pr {qualifiers}", "issues": f"is:issue {qualifiers}"},
+        SEARCH_NODE_FIELDS,
+    )
+
+    # GitHub timestamps are zero-padded ISO 8601, which sort the same as
+    # the dates they represent, so compare them as strings
+    start_s = start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    end_s = end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # A failed search is left out of the results, the other one is still used
+    filtered_items = []
+    for nodes in results.values():
+        for node in nodes:
+            created_at = node["createdAt"] or ""
+            closed_at = node["closedAt"] or ""
+
+            if start_s <= created_at < end_s or start_s <= closed_at < end_s:
+                filtered_items.append(
+                    {
+                        "number": node["number"],
+                        "title": node["title"],
+                        "url": node["url"],
+                        "repo": node["repository"]["nameWithOwner"],
+                        "state": node["state"],
+                        "createdAt": node["createdAt"],
+                        "closedAt": node["closedAt"],
+                        "isPullRequest": node["__typename"] == "PullRequest",
+                    }
+                )
+
+    return filtered_items
 
 
 def generate_report(username: str, week_num: int = None, year: int = None) -> None:
@@ -170,73 +172,72 @@ def generate_report(username: str, week_num: int = None, year: int = None) -> No
     """
     start_date, end_date, week_description = get_week_range(week_num, year)
 
-    print(f"\n{'=' * 70}")
+    print(f"\n{SEP_EQ}")
     print(f"GitHub Weekly Activity Report - {username}")
     print(f"Week: {week_description}")
-    print(f"{'=' * 70}\n")
+    print(f"{SEP_EQ}\n")
 
     print("Fetching your activity...\n")
 
-    # Fetch pull requests (filtered by created or closed date)
-    prs = search_user_activity(username, start_date, end_date, "pr")
+    # Fetch pull requests and issues (filtered by created or closed date)
+    all_items = search_user_activity(username, start_date, end_date)
 
-    # Fetch issues (filtered by created or closed date)
-    issues = search_user_activity(username, start_date, end_date, "issue")
+    # Group items by repository and count pull requests in a single pass
+    repo_data = defaultdict(list)
+    total_prs = 0
+    for item in all_items:
+        repo_data[item["repo"]].append(item)
+        if item["isPullRequest"]:
+            total_prs += 1
 
-    # Combine all items into a single list
-    all_items = prs + issues
+    # Collect the report and write it in one go once all data is available
+    out = []
 
-    # Print summary
-    print(f"{'─' * 70}")
-    print("SUMMARY")
-    print(f"{'─' * 70}")
-    print(f"Total Pull Requests: {len(prs)}")
-    print(f"Total Issues: {len(issues)}")
-    print(f"Total Items: {len(all_items)}\n")
+    # Summary
+    out.append(f"{SEP_LINE}\n")
+    out.append("SUMMARY\n")
+    out.append(f"{SEP_LINE}\n")
+    out.append(f"Total Pull Requests: {total_prs}\n")
+    out.append(f"Total Issues: {len(all_items) - total_prs}\n")
+    out.append(f"Total Items: {len(all_items)}\n\n")
 
     if not all_items:
-        print("No activity found for this week.")
+        out.append("No activity found for this week.\n")
     else:
-        # Sort by repository first, then by creation date within each repo
-        sorted_items = sorted(all_items, key=lambda x: (x["repository"]["nameWithOwner"], -datetime.strptime(x["createdAt"], "%Y-%m-%dT%H:%M:%SZ").timestamp()))
+        out.append(f"\n{SEP_EQ}\n")
+        out.append("ACTIVITY\n")
+        out.append(f"{SEP_EQ}\n\n")
+
+        for index, repo_name in enumerate(sorted(repo_data)):
+            if index > 0:
+                out.append("\n")  # Add spacing between repos
+            out.append(f"Repository: {repo_name}\n")
+            out.append(f"{SEP_DASH}\n")
+
+            # Sort by creation date within each repo, newest first. ISO 8601
+            # timestamps sort in date order, so no parsing is needed.
+            items = sorted(
+                repo_data[repo_name], key=lambda x: x["createdAt"], reverse=True
+            )
+            for item in items:
+                state = item["state"].upper()
+                item_type = "PR" if item["isPullRequest"] else "Issue"
 
-        print(f"\n{'=' * 70}")
-        print("ACTIVITY")
-        print(f"{'=' * 70}\n")
+                out.append(f"  • [{item_type}] #{item['number']}: {item['title']}\n")
+                out.append(f"    Status: {state}\n")
+                out.append(f"    Created: {format_date(item['createdAt'])}\n")
 
-        current_repo = None
-        for item in sorted_items:
-            created_date = datetime.strptime(
-                item["createdAt"], "%Y-%m-%dT%H:%M:%SZ"
-            )
-            state = item["state"].upper()
-            repo_name = item["repository"]["nameWithOwner"]
-            item_type = "PR" if item["item_type"] == "pr" else "Issue"
-
-            # Print repository header when it changes
-            if current_repo != repo_name:
-                if current_repo is not None:
-                    print()  # Add spacing between repos
-                print(f"Repository: {repo_name}")
-                print(f"{'-' * 70}")
-                current_repo = repo_name
-
-            print(f"  • [{item_type}] #{item['number']}: {item['title']}")
-            print(f"    Status: {state}")
-            print(f"    Created: {created_date.strftime('%Y %b %d')}")
-            
-            if item.get("closedAt") and not item["closedAt"].startswith("0001-01-01"):
-                closed_date = datetime.strptime(
-                    item["closedAt"], "%Y-%m-%dT%H:%M:%SZ"
-                )
-                print(f"    Closed: {closed_date.strftime('%Y %b %d')}")
-            
-            print(f"    Link: {item['url']}")
-            print()
-
-    print(f"\n{'=' * 70}")
-    print("Report generation complete!")
-    print(f"{'=' * 70}\n")
+                if item["closedAt"]:
+                    out.append(f"    Closed: {format_date(item['closedAt'])}\n")
+
+                out.append(f"    Link: {item['url']}\n")
+                out.append("\n")
+
+    out.append(f"\n{SEP_EQ}\n")
+    out.append("Report generation complete!\n")
+    out.append(f"{SEP_EQ}\n\n")
+
+    sys.stdout.write("".join(out))
 
 
 def main():